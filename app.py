@@ -11,8 +11,12 @@ import tempfile
 from pathlib import Path
 from datetime import datetime
 from epa_project_comparator import EPAProjectComparator
+from comparison_service import ComparisonClient, ServiceError
 import io
 
+# 設定 EPA_SERVICE_URL 時改由共用的本機比對服務執行（見 comparison_service.py）
+SERVICE_URL = os.environ.get('EPA_SERVICE_URL')
+
 # 設定頁面
 st.set_page_config(
     page_title="EPA 專案版本比對工具",
@@ -145,6 +149,16 @@ if uploaded_files:
         # 比對按鈕
         st.markdown("---")
         col_btn1, col_btn2 = st.columns([1, 4])
+
+        with col_btn2:
+            compact_output = st.checkbox(
+                "✂️ 精簡輸出（只保留有變動專案的最新列）",
+                help="檔案較小、開啟較快；以條件格式標色"
+            )
+            include_previous = st.checkbox(
+                "同時保留前一個時間點的列",
+                disabled=not compact_output
+            ) and compact_output
         
         with col_btn1:
             if st.button("🚀 開始比對", type="primary", use_container_width=True):
@@ -190,7 +204,31 @@ if uploaded_files:
                         output_path = os.path.join(temp_dir, output_filename)
                         
                         # 執行比對並匯出
-                        comparator.compare_and_export(output_path)
+                        if SERVICE_URL:
+                            # 交由共用服務執行，共用常駐 worker 與快照快取
+                            service_files = []
+                            for temp_path in temp_files:
+                                with open(temp_path, 'rb') as f:
+                                    service_files.append({'name': os.path.basename(temp_path),
+                                                          'content': f.read()})
+                            client = ComparisonClient(SERVICE_URL)
+                            job_id = client.submit(service_files, output_filename,
+                                                   compact=compact_output,
+                                                   include_previous=include_previous)
+                            try:
+                                job_info = client.wait(job_id)
+                                result_bytes = client.result(job_id)
+                            finally:
+                                client.delete(job_id)
+                            with open(output_path, 'wb') as f:
+                                f.write(result_bytes)
+                            comparison_stats = job_info['statistics']
+                            export_report = job_info['export_report']
+                        else:
+                            comparator.compare_and_export(output_path, compact=compact_output,
+                                                          include_previous=include_previous)
+                            comparison_stats = comparator.statistics.to_dict()
+                            export_report = comparator.export_report
                         
                         progress_bar.progress(90)
                         
@@ -204,10 +242,15 @@ if uploaded_files:
                         # 儲存到 session state
                         st.session_state['result_data'] = result_data
                         st.session_state['result_filename'] = output_filename
+                        st.session_state['comparison_stats'] = comparison_stats
+                        st.session_state['export_report'] = export_report
                         st.session_state['comparison_done'] = True
                         
                         st.success("✅ 比對完成！請點擊下方按鈕下載結果。")
                         
+                except ServiceError as e:
+                    st.error(f"❌ 比對服務錯誤：{str(e)}")
+                    st.session_state['comparison_done'] = False
                 except FileNotFoundError as e:
                     st.error(f"❌ 檔案錯誤：找不到指定的檔案\n{str(e)}")
                     st.session_state['comparison_done'] = False
@@ -239,11 +282,49 @@ if uploaded_files:
                 )
                 
                 st.info("💡 下載的 Excel 檔案包含顏色標記，可用 Excel 或 Google Sheets 開啟查看。")
+
+                export_report = st.session_state.get('export_report')
+                if export_report:
+                    st.caption(
+                        f"📄 {'精簡輸出，' if export_report['compact'] else ''}"
+                        f"{export_report['rows']} 列，{export_report['bytes'] / 1024:.1f} KB，"
+                        f"寫入 {export_report['seconds']:.2f} 秒"
+                    )
                 
                 # 顯示統計資訊（如果有的話）
-                if 'comparison_stats' in st.session_state:
+                if st.session_state.get('comparison_stats'):
+                    stats = st.session_state['comparison_stats']
                     st.markdown("### 📊 比對統計")
-                    st.json(st.session_state['comparison_stats'])
+
+                    if stats['structure_error']:
+                        st.warning("⚠️ 欄位結構不一致，未進行欄位比對")
+
+                    col_m1, col_m2, col_m3 = st.columns(3)
+                    col_m1.metric("專案總數", stats['total_projects'])
+                    col_m2.metric("有變動的專案", stats['changed_projects'])
+                    col_m3.metric("有變動的欄位", len(stats['column_change_counts']))
+
+                    if stats['column_change_counts']:
+                        st.markdown("**欄位變動次數**")
+                        st.bar_chart(pd.Series(stats['column_change_counts'], name='變動次數'))
+
+                    col_s1, col_s2 = st.columns(2)
+                    with col_s1:
+                        if stats['snapshot_churn']:
+                            st.markdown("**各快照新增／移除專案**")
+                            st.dataframe(
+                                pd.DataFrame(stats['snapshot_churn']).rename(
+                                    columns={'projects': '專案數', 'new': '新增', 'removed': '移除'}),
+                                use_container_width=True, hide_index=True
+                            )
+                    with col_s2:
+                        if stats['top_changing_projects']:
+                            st.markdown("**最常變動的專案**")
+                            st.dataframe(
+                                pd.DataFrame(stats['top_changing_projects']).rename(
+                                    columns={'project': '專案', 'change_count': '變動次數'}),
+                                use_container_width=True, hide_index=True
+                            )
 
 else:
     # 未上傳檔案時的說明
@@ -0,0 +1,682 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EPA 專案版本比對工具 - 本機 HTTP 比對服務
+功能：以共用的常駐 worker 程序池執行比對，並在請求之間共用已解析的快照快取
+
+端點：
+    GET    /health              服務狀態
+    POST   /jobs                提交比對工作，回傳 {'job_id': ...}
+    GET    /jobs/<job_id>        查詢工作狀態
+    GET    /jobs/<job_id>/result 下載比對結果 Excel
+    DELETE /jobs/<job_id>        刪除工作及其暫存檔案
+"""
+
+import base64
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from epa_project_comparator import EPAProjectComparator
+from excel_readers import select_engine
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+XLSX_MIME = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class ServiceError(Exception):
+    """比對服務回傳的錯誤"""
+
+
+# ---------------------------------------------------------------------------
+# Worker 端（在程序池中執行）
+# ---------------------------------------------------------------------------
+
+# 每個 worker 程序內的快照快取 {內容雜湊_引擎: (DataFrame, 位元組數)}，跨請求保留，
+# 依最近使用順序排列（最舊在前）
+_SNAPSHOT_MEMORY_CACHE: 'OrderedDict[str, Tuple[Any, int]]' = OrderedDict()
+_SNAPSHOT_MEMORY_BYTES = 0
+# 每個 worker 的記憶體快取上限，由 _warm_worker 依服務設定覆寫
+_SNAPSHOT_MEMORY_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _warm_worker(memory_cache_max_bytes: int = _SNAPSHOT_MEMORY_MAX_BYTES) -> None:
+    """
+    Worker 啟動時預先載入 pandas / openpyxl，避免每個請求重新 import
+
+    Args:
+        memory_cache_max_bytes: 此 worker 記憶體快照快取的上限（位元組）
+    """
+    global _SNAPSHOT_MEMORY_MAX_BYTES
+    _SNAPSHOT_MEMORY_MAX_BYTES = memory_cache_max_bytes
+    import pandas  # noqa: F401
+    import openpyxl  # noqa: F401
+
+
+def _memory_cache_get(cache_key: str):
+    """取出記憶體快取的快照並標記為最近使用；不存在時返回 None"""
+    entry = _SNAPSHOT_MEMORY_CACHE.get(cache_key)
+    if entry is None:
+        return None
+    _SNAPSHOT_MEMORY_CACHE.move_to_end(cache_key)
+    return entry[0]
+
+
+def _memory_cache_put(cache_key: str, df) -> None:
+    """
+    放入記憶體快取，並依最近使用順序淘汰，使總大小不超過 _SNAPSHOT_MEMORY_MAX_BYTES
+
+    單一快照超過上限時不快取（仍可由磁碟快取取得）。
+    """
+    global _SNAPSHOT_MEMORY_BYTES
+    if cache_key in _SNAPSHOT_MEMORY_CACHE:
+        _SNAPSHOT_MEMORY_CACHE.move_to_end(cache_key)
+        return
+    size = int(df.memory_usage(deep=True).sum())
+    if size > _SNAPSHOT_MEMORY_MAX_BYTES:
+        return
+    while _SNAPSHOT_MEMORY_CACHE and _SNAPSHOT_MEMORY_BYTES + size > _SNAPSHOT_MEMORY_MAX_BYTES:
+        _, (_, evicted_size) = _SNAPSHOT_MEMORY_CACHE.popitem(last=False)
+        _SNAPSHOT_MEMORY_BYTES -= evicted_size
+    _SNAPSHOT_MEMORY_CACHE[cache_key] = (df, size)
+    _SNAPSHOT_MEMORY_BYTES += size
+
+
+def _file_digest(file_path: str) -> str:
+    """計算檔案內容的 SHA-256 雜湊"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CachedEPAProjectComparator(EPAProjectComparator):
+    """以檔案內容雜湊快取解析結果的比對器（記憶體 + 磁碟兩層）"""
+
+    def __init__(self, excel_files: List[str], snapshot_dates: Optional[Dict[str, str]] = None,
+                 read_engine: str = 'auto', cache_dir: Optional[str] = None,
+                 tracked_columns: Optional[List[str]] = None, export_full_rows: bool = False):
+        """
+        Args:
+            excel_files: Excel 檔案路徑列表
+            snapshot_dates: 可選，手動指定檔案對應的日期 {檔案路徑: 'YYYY/MM/DD'}
+            read_engine: Excel 讀取引擎，預設 'auto'
+            cache_dir: 磁碟快取目錄，所有 worker 共用；None 表示只用記憶體快取
+            tracked_columns: 可選，只載入與比對這些欄位（專案 key 欄位會自動加入）
+            export_full_rows: 使用 tracked_columns 時，輸出仍包含原始檔案的全部欄位
+        """
+        super().__init__(excel_files, snapshot_dates, read_engine=read_engine,
+                         tracked_columns=tracked_columns, export_full_rows=export_full_rows)
+        self.cache_dir = cache_dir
+
+    def _read_excel(self, file_path: str, columns=None):
+        # 不同引擎推斷的型別可能不同，且可能只載入部分欄位，快取 key 需包含引擎與欄位
+        start = time.perf_counter()
+        cache_key = f"{_file_digest(file_path)}_{select_engine(file_path, self.read_engine)}"
+        if columns is not None:
+            columns_digest = hashlib.sha256('\n'.join(sorted(columns)).encode('utf-8')).hexdigest()[:16]
+            cache_key = f"{cache_key}_{columns_digest}"
+
+        df = _memory_cache_get(cache_key)
+        if df is None and self.cache_dir:
+            cache_path = os.path.join(self.cache_dir, f'{cache_key}.pkl')
+            try:
+                with open(cache_path, 'rb') as f:
+                    df = pickle.load(f)
+                # 更新修改時間，讓快取清理依最近使用時間淘汰
+                os.utime(cache_path)
+            except FileNotFoundError:
+                # 尚未快取，或剛被服務端的快取清理移除
+                df = None
+        if df is None:
+            df = super()._read_excel(file_path, columns)
+            if self.cache_dir:
+                # 先寫入暫存檔再改名，避免其他 worker 讀到寫到一半的檔案
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, os.path.join(self.cache_dir, f'{cache_key}.pkl'))
+        else:
+            self.load_timings.append({'file_path': file_path, 'engine': 'cache',
+                                      'seconds': time.perf_counter() - start, 'rows': len(df)})
+
+        _memory_cache_put(cache_key, df)
+
+        # _load_excel_files 會插入欄位，回傳副本以保護快取內容
+        return df.copy()
+
+
+def _run_job(excel_files: List[str], snapshot_dates: Dict[str, str], output_path: str,
+             cache_dir: Optional[str], comparator_options: Dict[str, Any],
+             export_options: Dict[str, bool]) -> Dict[str, Any]:
+    """
+    在 worker 程序中執行一次比對
+
+    Args:
+        comparator_options: CachedEPAProjectComparator 的參數（read_engine、tracked_columns、export_full_rows）
+        export_options: compare_and_export 的參數（compact、include_previous）
+
+    Returns:
+        {'output_path': 輸出檔案路徑, 'statistics': ChangeStatistics.to_dict(), 'export_report': 匯出紀錄}
+    """
+    comparator = CachedEPAProjectComparator(excel_files, snapshot_dates, cache_dir=cache_dir,
+                                            **comparator_options)
+    comparator.compare_and_export(output_path, **export_options)
+    return {'output_path': output_path, 'statistics': comparator.statistics.to_dict(),
+            'export_report': comparator.export_report}
+
+
+# ---------------------------------------------------------------------------
+# 服務端
+# ---------------------------------------------------------------------------
+
+def _validate_output_name(output_name: str) -> str:
+    """
+    檢查輸出檔名（去除路徑成分）
+
+    Returns:
+        可安全使用的檔名
+
+    Raises:
+        ValueError: 檔名為空、為 '.' / '..' 或副檔名不是 .xlsx
+    """
+    name = os.path.basename(str(output_name or '').strip())
+    stem, extension = os.path.splitext(name)
+    if not stem or stem.strip('.') == '' or extension.lower() != '.xlsx':
+        raise ValueError(f"輸出檔名需為 .xlsx 檔案: {output_name!r}")
+    return name
+
+
+class ComparisonService:
+    """管理比對工作與共用的 worker 程序池"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16,
+                 work_dir: Optional[str] = None, job_ttl: float = 3600.0,
+                 cache_max_bytes: int = 1024 * 1024 * 1024, cleanup_interval: float = 60.0,
+                 memory_cache_max_bytes: int = _SNAPSHOT_MEMORY_MAX_BYTES):
+        """
+        Args:
+            max_workers: 程序池大小
+            max_pending: 同時排隊／執行中的工作上限，超過時拒絕新工作
+            work_dir: 工作與快取目錄，None 時建立暫存目錄（關閉服務時一併刪除）
+            job_ttl: 已完成工作保留秒數，逾時未被刪除的工作會連同暫存檔案自動清除
+            cache_max_bytes: 磁碟快照快取上限，超過時刪除最久未使用的快取檔
+            cleanup_interval: 背景清理的間隔秒數
+            memory_cache_max_bytes: 每個 worker 記憶體快照快取上限（以 DataFrame 實際記憶體用量計），
+                超過時淘汰最久未使用的快照；服務最多使用約 max_workers 倍的此數值
+        """
+        self.max_pending = max_pending
+        self.job_ttl = job_ttl
+        self.cache_max_bytes = cache_max_bytes
+        self._owns_work_dir = work_dir is None
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix='epa_service_')
+        self.cache_dir = os.path.join(self.work_dir, 'snapshot_cache')
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # 程序池在 HTTP 處理執行緒中才啟動 worker，多執行緒程序不可 fork，改用 spawn
+        self._executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_warm_worker,
+                                             initargs=(memory_cache_max_bytes,),
+                                             mp_context=multiprocessing.get_context('spawn'))
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # 已刪除但仍在執行中的工作（無法取消），結束前仍計入 max_pending
+        self._detached_futures: Set[Future] = set()
+        self._lock = threading.Lock()
+
+        # 背景清理逾時工作與超量快取
+        self._stop_cleanup = threading.Event()
+        self._cleanup_thread = threading.Thread(target=self._cleanup_loop, args=(cleanup_interval,),
+                                                name='epa-service-cleanup', daemon=True)
+        self._cleanup_thread.start()
+
+    def _pending_count(self) -> int:
+        return (sum(1 for job in self._jobs.values() if not job['future'].done())
+                + len(self._detached_futures))
+
+    def submit(self, files: List[Dict[str, Any]], output_name: str = 'result.xlsx',
+               read_engine: str = 'auto', compact: bool = False, include_previous: bool = False,
+               tracked_columns: Optional[List[str]] = None, export_full_rows: bool = False) -> str:
+        """
+        提交比對工作
+
+        Args:
+            files: [{'name': 檔名, 'content': 檔案內容 bytes, 'snapshot_date': 可選日期}]
+            output_name: 輸出檔名
+            read_engine: Excel 讀取引擎，預設 'auto'
+            compact: 精簡輸出，只保留有變動專案的最新列
+            include_previous: 精簡輸出時同時保留前一個時間點的列
+            tracked_columns: 可選，只載入與比對這些欄位
+            export_full_rows: 使用 tracked_columns 時，輸出仍包含原始檔案的全部欄位
+
+        Returns:
+            工作 ID
+        """
+        if len(files) < 2:
+            raise ValueError("至少需要 2 個 Excel 檔案")
+        output_name = _validate_output_name(output_name)
+        if tracked_columns is not None and (
+                not isinstance(tracked_columns, list) or
+                not all(isinstance(col, str) for col in tracked_columns)):
+            raise ValueError("tracked_columns 需為欄位名稱字串列表")
+
+        with self._lock:
+            if self._pending_count() >= self.max_pending:
+                raise RuntimeError("比對服務忙碌中，請稍後再試")
+
+            job_id = uuid.uuid4().hex
+            job_dir = os.path.join(self.work_dir, job_id)
+            os.makedirs(job_dir)
+
+            excel_files = []
+            snapshot_dates = {}
+            for idx, file in enumerate(files, start=1):
+                # 加上序號避免檔名重複，並去除路徑成分
+                safe_name = f"{idx}_{os.path.basename(file['name'])}"
+                file_path = os.path.join(job_dir, safe_name)
+                with open(file_path, 'wb') as f:
+                    f.write(file['content'])
+                excel_files.append(file_path)
+                if file.get('snapshot_date'):
+                    snapshot_dates[file_path] = file['snapshot_date']
+
+            output_path = os.path.join(job_dir, output_name)
+            comparator_options = {
+                'read_engine': read_engine,
+                'tracked_columns': tracked_columns,
+                'export_full_rows': export_full_rows,
+            }
+            future = self._executor.submit(_run_job, excel_files, snapshot_dates, output_path,
+                                           self.cache_dir, comparator_options,
+                                           {'compact': compact, 'include_previous': include_previous})
+            job = {
+                'future': future,
+                'job_dir': job_dir,
+                'output_name': output_name,
+                'submitted_at': time.time(),
+                'finished_at': None,
+            }
+            self._jobs[job_id] = job
+        future.add_done_callback(lambda _: job.__setitem__('finished_at', time.time()))
+        return job_id
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """
+        查詢工作狀態
+
+        Returns:
+            {'job_id', 'status': queued/running/done/failed, 'error', 'output_name',
+             'statistics', 'export_report'}；statistics 與 export_report 只在工作完成後提供
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+
+        future: Future = job['future']
+        error = None
+        statistics = None
+        export_report = None
+        if future.done():
+            exc = future.exception()
+            state = 'failed' if exc else 'done'
+            error = f"{type(exc).__name__}: {exc}" if exc else None
+            if not exc:
+                statistics = future.result()['statistics']
+                export_report = future.result()['export_report']
+        elif future.running():
+            state = 'running'
+        else:
+            state = 'queued'
+        return {'job_id': job_id, 'status': state, 'error': error,
+                'output_name': job['output_name'], 'statistics': statistics,
+                'export_report': export_report}
+
+    def result_path(self, job_id: str) -> str:
+        """
+        取得已完成工作的輸出檔案路徑
+
+        Raises:
+            KeyError: 工作不存在
+            RuntimeError: 工作尚未完成或失敗
+        """
+        info = self.status(job_id)
+        if info['status'] != 'done':
+            raise RuntimeError(f"工作狀態為 {info['status']}，無法取得結果")
+        return self._jobs[job_id]['future'].result()['output_path']
+
+    def delete(self, job_id: str) -> None:
+        """刪除工作及其暫存檔案（執行中的工作會先取消）"""
+        with self._lock:
+            job = self._jobs.pop(job_id)
+            future = job['future']
+            # 已在 worker 中執行的工作無法取消，結束前仍佔用排隊名額
+            if not future.cancel() and not future.done():
+                self._detached_futures.add(future)
+
+        def release(_future: Future) -> None:
+            with self._lock:
+                self._detached_futures.discard(_future)
+            shutil.rmtree(job['job_dir'], ignore_errors=True)
+
+        # 已完成或已取消時 add_done_callback 會立即呼叫
+        future.add_done_callback(release)
+
+    def cleanup(self) -> Dict[str, int]:
+        """
+        清除逾時的已完成工作，並將磁碟快取縮減到 cache_max_bytes 以下
+
+        Returns:
+            {'jobs': 清除的工作數, 'cache_files': 刪除的快取檔數}
+        """
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job['finished_at'] is not None and now - job['finished_at'] > self.job_ttl]
+            expired_jobs = [self._jobs.pop(job_id) for job_id in expired]
+        for job in expired_jobs:
+            shutil.rmtree(job['job_dir'], ignore_errors=True)
+
+        # 依最近使用時間（mtime）由舊到新刪除，直到總大小低於上限
+        cache_files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                cache_files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in cache_files)
+        removed = 0
+        for _, size, path in sorted(cache_files):
+            if total <= self.cache_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        return {'jobs': len(expired_jobs), 'cache_files': removed}
+
+    def _cleanup_loop(self, interval: float) -> None:
+        while not self._stop_cleanup.wait(interval):
+            try:
+                self.cleanup()
+            except OSError:
+                # 清理失敗不影響服務，下一輪再試
+                pass
+
+    def shutdown(self) -> None:
+        """關閉程序池，並刪除服務自行建立的暫存工作目錄"""
+        self._stop_cleanup.set()
+        self._cleanup_thread.join()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        if self._owns_work_dir:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+class _ServiceRequestHandler(BaseHTTPRequestHandler):
+    """將 HTTP 請求轉交給 ComparisonService"""
+
+    server_version = 'EPAComparisonService/1.0'
+
+    @property
+    def service(self) -> ComparisonService:
+        return self.server.service
+
+    def log_message(self, format, *args):  # noqa: A002
+        if not getattr(self.server, 'quiet', False):
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self) -> List[str]:
+        return [part for part in self.path.split('?', 1)[0].split('/') if part]
+
+    def do_GET(self):
+        parts = self._route()
+        if parts == ['health']:
+            self._send_json(200, {'status': 'ok'})
+            return
+        if len(parts) in (2, 3) and parts[0] == 'jobs':
+            job_id = parts[1]
+            try:
+                if len(parts) == 2:
+                    self._send_json(200, self.service.status(job_id))
+                    return
+                if parts[2] == 'result':
+                    output_path = self.service.result_path(job_id)
+                    with open(output_path, 'rb') as f:
+                        body = f.read()
+                    self.send_response(200)
+                    self.send_header('Content-Type', XLSX_MIME)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+            except KeyError:
+                self._send_json(404, {'error': f"找不到工作: {job_id}"})
+                return
+            except RuntimeError as e:
+                self._send_json(409, {'error': str(e)})
+                return
+        self._send_json(404, {'error': f"找不到路徑: {self.path}"})
+
+    def do_POST(self):
+        if self._route() != ['jobs']:
+            self._send_json(404, {'error': f"找不到路徑: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length).decode('utf-8'))
+            files = [{
+                'name': file['name'],
+                'content': base64.b64decode(file['content']),
+                'snapshot_date': file.get('snapshot_date'),
+            } for file in payload['files']]
+            job_id = self.service.submit(files, payload.get('output_name', 'result.xlsx'),
+                                         payload.get('read_engine', 'auto'),
+                                         bool(payload.get('compact', False)),
+                                         bool(payload.get('include_previous', False)),
+                                         payload.get('tracked_columns'),
+                                         bool(payload.get('export_full_rows', False)))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': f"請求格式錯誤: {e}"})
+            return
+        except RuntimeError as e:
+            self._send_json(503, {'error': str(e)})
+            return
+        self._send_json(202, {'job_id': job_id})
+
+    def do_DELETE(self):
+        parts = self._route()
+        if len(parts) == 2 and parts[0] == 'jobs':
+            try:
+                self.service.delete(parts[1])
+            except KeyError:
+                self._send_json(404, {'error': f"找不到工作: {parts[1]}"})
+                return
+            self._send_json(200, {'job_id': parts[1], 'deleted': True})
+            return
+        self._send_json(404, {'error': f"找不到路徑: {self.path}"})
+
+
+def create_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                  service: Optional[ComparisonService] = None,
+                  quiet: bool = False) -> ThreadingHTTPServer:
+    """
+    建立 HTTP 伺服器（port=0 時由系統分配可用埠號）
+
+    Returns:
+        尚未啟動的 ThreadingHTTPServer，呼叫 serve_forever() 開始服務
+    """
+    server = ThreadingHTTPServer((host, port), _ServiceRequestHandler)
+    server.service = service or ComparisonService()
+    server.quiet = quiet
+    return server
+
+
+# ---------------------------------------------------------------------------
+# 客戶端
+# ---------------------------------------------------------------------------
+
+class ComparisonClient:
+    """比對服務的輕量客戶端（僅使用標準函式庫）"""
+
+    def __init__(self, base_url: str = f'http://{DEFAULT_HOST}:{DEFAULT_PORT}', timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> bytes:
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(f'{self.base_url}{path}', data=data, method=method)
+        if data is not None:
+            request.add_header('Content-Type', 'application/json')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode('utf-8')).get('error', str(e))
+            except ValueError:
+                message = str(e)
+            raise ServiceError(message) from e
+
+    def health(self) -> bool:
+        """服務是否可連線"""
+        try:
+            return json.loads(self._request('GET', '/health'))['status'] == 'ok'
+        except (ServiceError, OSError):
+            return False
+
+    def submit(self, files: List[Dict[str, Any]], output_name: str = 'result.xlsx',
+               read_engine: str = 'auto', compact: bool = False, include_previous: bool = False,
+               tracked_columns: Optional[List[str]] = None, export_full_rows: bool = False) -> str:
+        """
+        提交比對工作
+
+        Args:
+            files: [{'name': 檔名, 'content': 檔案內容 bytes, 'snapshot_date': 可選日期}]
+            read_engine: Excel 讀取引擎，預設 'auto'
+            compact: 精簡輸出，只保留有變動專案的最新列
+            include_previous: 精簡輸出時同時保留前一個時間點的列
+            tracked_columns: 可選，只載入與比對這些欄位
+            export_full_rows: 使用 tracked_columns 時，輸出仍包含原始檔案的全部欄位
+        """
+        payload = {
+            'output_name': output_name,
+            'read_engine': read_engine,
+            'compact': compact,
+            'include_previous': include_previous,
+            'tracked_columns': tracked_columns,
+            'export_full_rows': export_full_rows,
+            'files': [{
+                'name': file['name'],
+                'content': base64.b64encode(file['content']).decode('ascii'),
+                'snapshot_date': file.get('snapshot_date'),
+            } for file in files],
+        }
+        return json.loads(self._request('POST', '/jobs', payload))['job_id']
+
+    def status(self, job_id: str) -> Dict[str, Any]:
+        """查詢工作狀態"""
+        return json.loads(self._request('GET', f'/jobs/{job_id}'))
+
+    def result(self, job_id: str) -> bytes:
+        """下載比對結果 Excel"""
+        return self._request('GET', f'/jobs/{job_id}/result')
+
+    def delete(self, job_id: str) -> None:
+        """刪除工作"""
+        self._request('DELETE', f'/jobs/{job_id}')
+
+    def wait(self, job_id: str, poll_interval: float = 0.5, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        等待工作完成
+
+        Returns:
+            工作狀態（含 statistics）
+
+        Raises:
+            ServiceError: 工作失敗
+            TimeoutError: 超過等待時間
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            info = self.status(job_id)
+            if info['status'] == 'done':
+                return info
+            if info['status'] == 'failed':
+                raise ServiceError(info['error'])
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"等待工作 {job_id} 逾時")
+            time.sleep(poll_interval)
+
+    def compare(self, files: List[Dict[str, Any]], output_name: str = 'result.xlsx',
+                poll_interval: float = 0.5, timeout: Optional[float] = None,
+                read_engine: str = 'auto', compact: bool = False, include_previous: bool = False,
+                tracked_columns: Optional[List[str]] = None, export_full_rows: bool = False) -> bytes:
+        """提交、等待並下載結果，完成後刪除服務端的工作"""
+        job_id = self.submit(files, output_name, read_engine, compact, include_previous,
+                             tracked_columns, export_full_rows)
+        try:
+            self.wait(job_id, poll_interval=poll_interval, timeout=timeout)
+            return self.result(job_id)
+        finally:
+            self.delete(job_id)
+
+
+def main():
+    """服務啟動入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='EPA 專案版本比對 - 本機 HTTP 比對服務')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'綁定位址（預設 {DEFAULT_HOST}）')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'埠號（預設 {DEFAULT_PORT}）')
+    parser.add_argument('--workers', type=int, default=2, help='worker 程序數（預設 2）')
+    parser.add_argument('--max-pending', type=int, default=16, help='排隊中工作上限（預設 16）')
+    parser.add_argument('--work-dir', default=None, help='工作與快取目錄（預設為暫存目錄，關閉時刪除）')
+    parser.add_argument('--job-ttl', type=float, default=3600, help='已完成工作保留秒數（預設 3600）')
+    parser.add_argument('--cache-max-mb', type=int, default=1024, help='磁碟快照快取上限 MB（預設 1024）')
+    parser.add_argument('--memory-cache-mb', type=int, default=256,
+                        help='每個 worker 的記憶體快照快取上限 MB（預設 256）')
+    args = parser.parse_args()
+
+    service = ComparisonService(max_workers=args.workers, max_pending=args.max_pending,
+                                work_dir=args.work_dir, job_ttl=args.job_ttl,
+                                cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+                                memory_cache_max_bytes=args.memory_cache_mb * 1024 * 1024)
+    server = create_server(args.host, args.port, service)
+    print(f"🌐 比對服務已啟動: http://{args.host}:{server.server_address[1]}")
+    print("按 Ctrl+C 可停止服務")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,14 +5,63 @@ EPA 專案版本比對工具
 功能：比較多個時間點的 EPA 專案 Excel 檔案，標示實質變動
 """
 
-import pandas as pd
+from __future__ import annotations
+
 import os
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
-import openpyxl
-from openpyxl.styles import PatternFill
-from openpyxl.utils import get_column_letter
+from typing import TYPE_CHECKING, Any, FrozenSet, List, Dict, Tuple, Optional
+
+# pandas / openpyxl 在實際使用時才延遲載入，讓 --help、參數錯誤與結構預檢可以立即回應
+if TYPE_CHECKING:
+    import pandas as pd
+    from openpyxl.styles import PatternFill
+
+
+class _LazyFill:
+    """延遲建立的類別層級填色：第一次存取時才載入 openpyxl，類別與實例皆可存取"""
+
+    def __init__(self, color_attr: str):
+        self.color_attr = color_attr
+        self._fills: Dict[str, PatternFill] = {}
+
+    def __get__(self, obj, owner) -> PatternFill:
+        color = getattr(owner, self.color_attr)
+        if color not in self._fills:
+            self._fills[color] = owner._make_fill(color)
+        return self._fills[color]
+
+
+@dataclass
+class ChangeStatistics:
+    """比對結果的彙總統計"""
+
+    # 專案總數（不含空白 key）
+    total_projects: int = 0
+    # 最新時間點有變動的專案數
+    changed_projects: int = 0
+    # 是否因欄位結構不一致而未比對
+    structure_error: bool = False
+    # 各欄位在最新比對中的變動次數 {欄位: 次數}，由多到少排序
+    column_change_counts: Dict[str, int] = field(default_factory=dict)
+    # 各快照的專案數與相對前一個快照的新增／移除數
+    # [{'Seq', 'Snapshot_Date', 'projects', 'new', 'removed'}]
+    snapshot_churn: List[Dict[str, Any]] = field(default_factory=list)
+    # 歷次快照間變動次數最多的專案 [{'project', 'change_count'}]
+    top_changing_projects: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """轉為可序列化為 JSON 的字典"""
+        return {
+            'total_projects': self.total_projects,
+            'changed_projects': self.changed_projects,
+            'structure_error': self.structure_error,
+            'column_change_counts': dict(self.column_change_counts),
+            'snapshot_churn': [dict(row) for row in self.snapshot_churn],
+            'top_changing_projects': [dict(row) for row in self.top_changing_projects],
+        }
 
 
 class EPAProjectComparator:
@@ -25,22 +74,50 @@ class EPAProjectComparator:
     PROJECT_KEY_COLUMNS = ['Project Name', 'Applicant Name', '專案名稱', '申請人名稱']
     
     # 顏色定義
-    YELLOW_FILL = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')  # 🟡 黃色
-    RED_FILL = PatternFill(start_color='FF0000', end_color='FF0000', fill_type='solid')     # 🔴 紅色
+    YELLOW_COLOR = 'FFFF00'  # 🟡 黃色
+    RED_COLOR = 'FF0000'     # 🔴 紅色
+    YELLOW_FILL = _LazyFill('YELLOW_COLOR')
+    RED_FILL = _LazyFill('RED_COLOR')
+
+    # 統計工作表名稱
+    SUMMARY_SHEET_NAME = '變動統計'
     
-    def __init__(self, excel_files: List[str], snapshot_dates: Optional[Dict[str, str]] = None):
+    def __init__(self, excel_files: List[str], snapshot_dates: Optional[Dict[str, str]] = None,
+                 read_engine: str = 'auto', compare_workers: int = 1,
+                 tracked_columns: Optional[List[str]] = None, export_full_rows: bool = False):
         """
         初始化比對器
         
         Args:
             excel_files: Excel 檔案路徑列表
             snapshot_dates: 可選，手動指定檔案對應的日期 {檔案路徑: 'YYYY/MM/DD'}
+            read_engine: Excel 讀取引擎（openpyxl / calamine / xlrd），預設 'auto' 依檔案類型與大小自動選擇
+            compare_workers: 比對欄位使用的程序數，大於 1 時依專案 key 雜湊分片平行比對；0 表示使用所有 CPU
+            tracked_columns: 可選，只載入與比對這些欄位（專案 key 欄位會自動加入）；None 表示全部欄位
+            export_full_rows: 使用 tracked_columns 時，輸出仍包含原始檔案的全部欄位
         """
         self.excel_files = excel_files
         self.snapshot_dates = snapshot_dates or {}
+        self.read_engine = read_engine
+        self.compare_workers = compare_workers or os.cpu_count() or 1
+        self.tracked_columns = list(tracked_columns) if tracked_columns else None
+        self.export_full_rows = export_full_rows and self.tracked_columns is not None
         self.dataframes = []
         self.file_metadata = []
-        
+        self.statistics: Optional[ChangeStatistics] = None
+        # 每個檔案的讀取紀錄 [{'file_path', 'engine', 'seconds', 'rows'}]
+        self.load_timings: List[Dict[str, Any]] = []
+        # 結構預檢忽略的尾端空白標題數 {檔案路徑: 數量}
+        self.ignored_header_cells: Dict[str, int] = {}
+        # 匯出紀錄 {'rows', 'bytes', 'seconds', 'compact'}
+        self.export_report: Dict[str, Any] = {}
+
+    @staticmethod
+    def _make_fill(color: str) -> PatternFill:
+        """建立實心填色（延遲載入 openpyxl）"""
+        from openpyxl.styles import PatternFill
+        return PatternFill(start_color=color, end_color=color, fill_type='solid')
+
     def _get_file_time(self, file_path: str) -> str:
         """
         判斷檔案時間（優先順序：使用者指定 > 檔案修改時間）
@@ -57,6 +134,170 @@ class EPAProjectComparator:
         mod_time = datetime.fromtimestamp(file_stat.st_mtime)
         return mod_time.strftime('%Y/%m/%d')
     
+    @staticmethod
+    def _trailing_blank_count(values) -> int:
+        """標題列尾端連續空白儲存格的數量"""
+        count = 0
+        for value in reversed(list(values)):
+            if value is not None and str(value).strip() != '':
+                break
+            count += 1
+        return count
+
+    @staticmethod
+    def _normalize_header(values) -> List[str]:
+        """
+        將原始標題列轉為與 pandas 一致的欄位名稱
+
+        空白標題轉為 'Unnamed: N'，重複名稱依序加上 '.1'、'.2'，
+        並忽略尾端的空白儲存格。只讀標題列無法得知其下是否有資料，
+        若有資料，pandas 完整載入時會保留為 'Unnamed: N' 欄位，
+        因此預檢會另外回報被忽略的尾端空白標題數（見 ignored_header_cells）。
+        """
+        values = list(values)
+        del values[len(values) - EPAProjectComparator._trailing_blank_count(values):]
+
+        columns = []
+        seen = {}
+        for idx, value in enumerate(values):
+            if value is None or str(value).strip() == '':
+                name = f'Unnamed: {idx}'
+            else:
+                name = str(value)
+            if name in seen:
+                seen[name] += 1
+                name = f'{name}.{seen[name]}'
+            else:
+                seen[name] = 0
+            columns.append(name)
+        return columns
+
+    def _read_header_columns(self, file_path: str) -> List[str]:
+        """
+        只讀取第一個工作表的標題列（不解析資料列）
+
+        .xlsx 使用 openpyxl read_only 模式，.xls 使用 xlrd on_demand 模式。
+        尾端空白標題不列入欄位，其數量記錄於 self.ignored_header_cells。
+
+        Returns:
+            欄位名稱列表
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"檔案不存在: {file_path}")
+
+        if file_path.lower().endswith('.xls'):
+            import xlrd
+            book = xlrd.open_workbook(file_path, on_demand=True)
+            try:
+                sheet = book.sheet_by_index(0)
+                values = sheet.row_values(0) if sheet.nrows else []
+            finally:
+                book.release_resources()
+        else:
+            import openpyxl
+            wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                ws = wb.worksheets[0]
+                values = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+            finally:
+                wb.close()
+
+        trailing_blanks = self._trailing_blank_count(values)
+        if trailing_blanks:
+            self.ignored_header_cells[file_path] = trailing_blanks
+        return self._normalize_header(values)
+
+    @staticmethod
+    def _diff_columns(base_columns: List[str], current_columns: List[str]) -> Dict[str, List[str]]:
+        """
+        比較兩組欄位結構
+
+        Returns:
+            {'missing': 缺少的欄位, 'extra': 多出的欄位, 'order_changed': 共同欄位的順序是否不同}
+            結構一致時返回空字典
+        """
+        if current_columns == base_columns:
+            return {}
+
+        current_col_set = set(current_columns)
+        base_col_set = set(base_columns)
+        # 只比較兩邊都有的欄位，增減欄位的同時調換順序也能偵測到
+        return {
+            'missing': [col for col in base_columns if col not in current_col_set],
+            'extra': [col for col in current_columns if col not in base_col_set],
+            'order_changed': ([col for col in current_columns if col in base_col_set]
+                              != [col for col in base_columns if col in current_col_set]),
+        }
+
+    @staticmethod
+    def load_column_profile(profile_path: str) -> List[str]:
+        """
+        讀取追蹤欄位設定檔（每行一個欄位名稱，# 開頭為註解；可含 UTF-8 BOM，例如記事本存檔）
+
+        Returns:
+            欄位名稱列表
+        """
+        with open(profile_path, encoding='utf-8-sig') as f:
+            lines = [line.strip() for line in f]
+        return [line for line in lines if line and not line.startswith('#')]
+
+    @property
+    def _loaded_columns(self) -> Optional[FrozenSet[str]]:
+        """實際需要載入的欄位（追蹤欄位 + 專案 key 欄位）；None 表示全部欄位"""
+        if self.tracked_columns is None:
+            return None
+        return frozenset(self.tracked_columns) | frozenset(self.PROJECT_KEY_COLUMNS)
+
+    def preflight_check(self) -> List[Dict[str, Any]]:
+        """
+        結構預檢：只讀取每個檔案的標題列，在完整載入前找出欄位結構差異
+
+        設定 tracked_columns 時只檢查會載入的欄位。尾端空白標題不列入比較，
+        其數量記錄於 self.ignored_header_cells（其下若有資料，完整載入時仍可能判定結構不一致）。
+
+        Returns:
+            每個與第一個檔案結構不一致的檔案一筆紀錄：
+            {'file_path', 'missing', 'extra', 'order_changed'}；全部一致時返回空列表
+        """
+        loaded_columns = self._loaded_columns
+        headers = []
+        for file_path in self.excel_files:
+            columns = self._read_header_columns(file_path)
+            if loaded_columns is not None:
+                columns = [col for col in columns if col in loaded_columns]
+            headers.append((file_path, columns))
+        if len(headers) < 2:
+            return []
+
+        base_columns = headers[0][1]
+        drifts = []
+        for file_path, columns in headers[1:]:
+            diff = self._diff_columns(base_columns, columns)
+            if diff:
+                drifts.append({'file_path': file_path, **diff})
+        return drifts
+
+    def _read_excel(self, file_path: str, columns: Optional[FrozenSet[str]] = None) -> pd.DataFrame:
+        """
+        解析單一 Excel 檔案（子類別可覆寫以加入快取等機制）
+
+        Args:
+            file_path: Excel 檔案路徑
+            columns: 可選，只保留這些欄位（透過 usecols 交給讀取引擎）；None 表示全部欄位。
+                讀取引擎仍會解析整個工作表，只是不保留其他欄位，因此節省的是記憶體與後續比對，
+                而非解析時間
+
+        Returns:
+            原始資料的 DataFrame（尚未加入 Seq / Snapshot_Date）
+        """
+        from excel_readers import read_excel
+
+        usecols = (lambda col: str(col) in columns) if columns is not None else None
+        df, engine, seconds = read_excel(file_path, self.read_engine, usecols=usecols)
+        self.load_timings.append({'file_path': file_path, 'engine': engine,
+                                  'seconds': seconds, 'rows': len(df)})
+        return df
+
     def _load_excel_files(self) -> None:
         """載入所有 Excel 檔案並進行前處理"""
         for idx, file_path in enumerate(self.excel_files, start=1):
@@ -64,7 +305,7 @@ class EPAProjectComparator:
                 raise FileNotFoundError(f"檔案不存在: {file_path}")
             
             # 讀取 Excel
-            df = pd.read_excel(file_path)
+            df = self._read_excel(file_path, self._loaded_columns)
             
             # 判斷時間
             snapshot_date = self._get_file_time(file_path)
@@ -72,6 +313,10 @@ class EPAProjectComparator:
             # 新增 Seq 和 Snapshot_Date 欄位（放在最前方）
             df.insert(0, 'Snapshot_Date', snapshot_date)
             df.insert(0, 'Seq', idx)
+
+            # 記錄原始列位置，匯出完整欄位時用來對回原始資料
+            if self.export_full_rows:
+                df['__ROW__'] = range(len(df))
             
             self.dataframes.append(df)
             self.file_metadata.append({
@@ -93,19 +338,13 @@ class EPAProjectComparator:
         
         # 以第一個檔案為基準
         base_columns = self.file_metadata[0]['columns']
-        base_col_set = set(base_columns)
         
         structure_issues = {}
         
         # 檢查每個檔案
         for metadata in self.file_metadata[1:]:
-            current_columns = metadata['columns']
-            current_col_set = set(current_columns)
-            
             # 檢查欄位數量、名稱、順序
-            if (len(current_columns) != len(base_columns) or
-                current_col_set != base_col_set or
-                current_columns != base_columns):
+            if self._diff_columns(base_columns, metadata['columns']):
                 # 結構不一致，標記所有專案
                 structure_issues['__ALL__'] = True
                 break
@@ -134,6 +373,8 @@ class EPAProjectComparator:
         Returns:
             正規化後的字串
         """
+        import pandas as pd
+
         if pd.isna(value):
             return ''
         return str(value).strip().lower()
@@ -145,6 +386,8 @@ class EPAProjectComparator:
         Returns:
             合併後的 DataFrame，依 Snapshot_Date 排序
         """
+        import pandas as pd
+
         # 檢查欄位結構
         structure_issues = self._check_column_structure()
         has_structure_issue = '__ALL__' in structure_issues
@@ -178,6 +421,12 @@ class EPAProjectComparator:
         
         return merged_df
     
+    def _comparable_columns(self, df: pd.DataFrame) -> List[str]:
+        """取得需要比對的欄位（排除 EXCLUDED_COLUMNS 與內部欄位）"""
+        return [col for col in df.columns
+                if col not in self.EXCLUDED_COLUMNS and
+                not col.startswith('__')]
+
     def _compare_fields(self, merged_df: pd.DataFrame) -> pd.DataFrame:
         """
         比對欄位並標記變動
@@ -188,6 +437,8 @@ class EPAProjectComparator:
         Returns:
             新增了變動標記的 DataFrame
         """
+        import pandas as pd
+
         # 檢查是否有結構錯誤
         if '__STRUCTURE_ERROR__' in merged_df.columns:
             merged_df['__HAS_CHANGE__'] = False
@@ -198,9 +449,7 @@ class EPAProjectComparator:
         key_column = self._find_project_key_column(merged_df)
         
         # 取得所有欄位（排除不比較的欄位）
-        all_columns = [col for col in merged_df.columns 
-                      if col not in self.EXCLUDED_COLUMNS and 
-                      not col.startswith('__')]
+        all_columns = self._comparable_columns(merged_df)
         
         # 初始化標記欄位
         merged_df['__HAS_CHANGE__'] = False
@@ -249,119 +498,351 @@ class EPAProjectComparator:
         
         return merged_df
     
-    def _apply_colors_to_excel(self, output_path: str, merged_df: pd.DataFrame) -> None:
+    def _compare_fields_sharded(self, merged_df: pd.DataFrame, workers: int) -> pd.DataFrame:
+        """
+        依正規化 key 的雜湊值將資料分片，在多個程序中平行比對欄位
+
+        同一專案的所有列必定落在同一分片，因此結果與 _compare_fields 完全相同。
+
+        Args:
+            merged_df: 合併後的 DataFrame
+            workers: 程序數（即分片數）
+
+        Returns:
+            新增了變動標記的 DataFrame
+        """
+        import pandas as pd
+        from concurrent.futures import ProcessPoolExecutor
+
+        if '__STRUCTURE_ERROR__' in merged_df.columns or workers <= 1:
+            return self._compare_fields(merged_df)
+
+        shard_ids = (pd.util.hash_pandas_object(merged_df['__NORMALIZED_KEY__'], index=False)
+                     .to_numpy() % workers)
+        shards = [merged_df[shard_ids == shard_id] for shard_id in range(workers)]
+        shards = [shard for shard in shards if not shard.empty]
+
+        # 初始化標記欄位
+        merged_df['__HAS_CHANGE__'] = False
+        merged_df['__CHANGED_CELLS__'] = None
+
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            for changed in executor.map(_compare_shard, [type(self)] * len(shards), shards):
+                merged_df.loc[changed.index, '__HAS_CHANGE__'] = True
+                merged_df.loc[changed.index, '__CHANGED_CELLS__'] = changed['__CHANGED_CELLS__']
+
+        return merged_df
+
+    def compute_change_statistics(self, merged_df: pd.DataFrame, top_n: int = 10) -> ChangeStatistics:
+        """
+        以向量化運算彙總比對結果
+
+        Args:
+            merged_df: 已執行 _compare_fields 的 DataFrame
+            top_n: 最常變動專案的筆數
+
+        Returns:
+            ChangeStatistics
+        """
+        import pandas as pd
+
+        keyed = merged_df[merged_df['__NORMALIZED_KEY__'] != '']
+        stats = ChangeStatistics(
+            total_projects=int(keyed['__NORMALIZED_KEY__'].nunique()),
+            changed_projects=int(merged_df['__HAS_CHANGE__'].sum()),
+            structure_error='__STRUCTURE_ERROR__' in merged_df.columns,
+        )
+        if stats.structure_error or keyed.empty:
+            return stats
+
+        # 各欄位變動次數（最新 vs 前一個時間點）
+        changed_cells = merged_df['__CHANGED_CELLS__'].dropna()
+        if not changed_cells.empty:
+            counts = changed_cells.str.split(',').explode().value_counts()
+            stats.column_change_counts = {str(col): int(n) for col, n in counts.items()}
+
+        # 各快照新增／移除的專案（以專案 × 快照的出現矩陣計算）
+        snapshots = (keyed[['Seq', 'Snapshot_Date']].drop_duplicates()
+                     .sort_values(['Snapshot_Date', 'Seq']))
+        presence = (pd.crosstab(keyed['__NORMALIZED_KEY__'], keyed['Seq']) > 0)
+        presence = presence.reindex(columns=snapshots['Seq'], fill_value=False)
+        previous = presence.shift(1, axis=1, fill_value=False)
+        new_counts = (presence & ~previous).sum()
+        removed_counts = (~presence & previous).sum()
+        first_seq = snapshots['Seq'].iloc[0]
+        stats.snapshot_churn = [{
+            'Seq': int(seq),
+            'Snapshot_Date': snapshot_date,
+            'projects': int(presence[seq].sum()),
+            'new': 0 if seq == first_seq else int(new_counts[seq]),
+            'removed': 0 if seq == first_seq else int(removed_counts[seq]),
+        } for seq, snapshot_date in snapshots.itertuples(index=False)]
+
+        # 歷次相鄰快照間的變動次數（同一專案逐列與前一列比較）
+        columns = self._comparable_columns(keyed)
+        ordered = keyed.sort_values(['__NORMALIZED_KEY__', 'Snapshot_Date', 'Seq'])
+        keys = ordered['__NORMALIZED_KEY__']
+        has_previous = ordered.groupby(keys, sort=False).cumcount() > 0
+
+        # 先轉為字串再位移，避免 shift 產生 NaN 使整數欄位變成浮點數
+        current_na = ordered[columns].isna()
+        current_str = ordered[columns].astype(str).apply(lambda col: col.str.strip())
+        previous_na = current_na.groupby(keys, sort=False).shift(1, fill_value=False)
+        previous_str = current_str.groupby(keys, sort=False).shift(1)
+        cell_changed = (current_na != previous_na) | (~current_na & ~previous_na & (current_str != previous_str))
+        row_changed = cell_changed.any(axis=1) & has_previous
+
+        change_counts = row_changed.groupby(keys).sum()
+        change_counts = change_counts[change_counts > 0].sort_values(ascending=False, kind='stable').head(top_n)
+        if not change_counts.empty:
+            key_column = self._find_project_key_column(keyed)
+            display_names = ordered.groupby('__NORMALIZED_KEY__')[key_column].last()
+            stats.top_changing_projects = [{
+                'project': str(display_names[key]),
+                'change_count': int(n),
+            } for key, n in change_counts.items()]
+
+        return stats
+
+    def _write_summary_sheet(self, wb, statistics: ChangeStatistics) -> None:
+        """
+        在活頁簿中新增「變動統計」工作表
+
+        Args:
+            wb: openpyxl Workbook
+            statistics: 比對統計
+        """
+        from openpyxl.styles import Font
+
+        ws = wb.create_sheet(self.SUMMARY_SHEET_NAME)
+        bold = Font(bold=True)
+
+        def append_section(title, header, rows):
+            ws.append([title])
+            ws.cell(row=ws.max_row, column=1).font = bold
+            ws.append(header)
+            for cell in ws[ws.max_row]:
+                cell.font = bold
+            for row in rows:
+                ws.append(row)
+            ws.append([])
+
+        append_section('概要', ['項目', '數值'], [
+            ['專案總數', statistics.total_projects],
+            ['有變動的專案數', statistics.changed_projects],
+            ['欄位結構異常', '是' if statistics.structure_error else '否'],
+        ])
+        append_section('欄位變動次數', ['欄位', '變動次數'],
+                       [[col, n] for col, n in statistics.column_change_counts.items()])
+        append_section('各快照新增／移除專案', ['Seq', 'Snapshot_Date', '專案數', '新增', '移除'],
+                       [[row['Seq'], row['Snapshot_Date'], row['projects'], row['new'], row['removed']]
+                        for row in statistics.snapshot_churn])
+        append_section('最常變動的專案', ['專案', '變動次數'],
+                       [[row['project'], row['change_count']] for row in statistics.top_changing_projects])
+
+        ws.column_dimensions['A'].width = 30
+        ws.column_dimensions['B'].width = 16
+
+    def _attach_full_rows(self, merged_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        以原始檔案的完整欄位取代追蹤欄位
+
+        只重新讀取有輸出列的檔案，但每個檔案都是完整讀取；非精簡模式下每個檔案都有輸出列，
+        等於所有檔案讀取兩次。讀取紀錄同樣附加於 self.load_timings。
+
+        Args:
+            merged_df: 已標記變動、含 __ROW__ 欄位的 DataFrame
+
+        Returns:
+            欄位為 Seq、Snapshot_Date、原始檔案全部欄位及內部標記欄位的 DataFrame
+        """
+        import pandas as pd
+
+        full_parts = []
+        for metadata in self.file_metadata:
+            rows = merged_df[merged_df['Seq'] == metadata['seq']]
+            if rows.empty:
+                continue
+            full_df = self._read_excel(metadata['file_path'])
+            part = full_df.iloc[rows['__ROW__'].to_numpy()]
+            part.index = rows.index
+            full_parts.append(part)
+
+        full_rows = pd.concat(full_parts) if full_parts else pd.DataFrame(index=merged_df.index[:0])
+        internal_columns = [col for col in merged_df.columns if col.startswith('__')]
+        return pd.concat([merged_df[['Seq', 'Snapshot_Date']],
+                          full_rows.reindex(merged_df.index),
+                          merged_df[internal_columns]], axis=1)
+
+    def _select_compact_rows(self, merged_df: pd.DataFrame, include_previous: bool = False) -> pd.DataFrame:
+        """
+        精簡模式：只保留有變動專案的最新列
+
+        Args:
+            merged_df: 已標記變動的 DataFrame
+            include_previous: 是否同時保留前一個時間點的列
+
+        Returns:
+            篩選後的 DataFrame（結構異常時保留全部資料列）；
+            include_previous 時前一個時間點的列另成一段接在最新列之後，
+            讓標色的最新列保持連續，條件格式範圍不會隨變動數量分裂
+        """
+        import pandas as pd
+
+        if '__STRUCTURE_ERROR__' in merged_df.columns:
+            return merged_df
+
+        is_latest = merged_df['__HAS_CHANGE__'].astype(bool)
+        if not include_previous:
+            return merged_df[is_latest]
+
+        # merged_df 已依專案與時間排序，最新列的上一列即同專案的前一個時間點
+        is_previous = is_latest.groupby(merged_df['__NORMALIZED_KEY__'], sort=False).shift(-1, fill_value=False)
+        return pd.concat([merged_df[is_latest], merged_df[is_previous]])
+
+    @staticmethod
+    def _cell_ranges(col_idx: int, rows) -> List[str]:
+        """將同一欄的列號合併為連續範圍，例如 ['C2:C5', 'C9']"""
+        from openpyxl.utils import get_column_letter
+
+        letter = get_column_letter(col_idx)
+        ranges = []
+        sorted_rows = sorted(rows)
+        start = end = sorted_rows[0]
+        for row in sorted_rows[1:]:
+            if row == end + 1:
+                end = row
+                continue
+            ranges.append(f'{letter}{start}' if start == end else f'{letter}{start}:{letter}{end}')
+            start = end = row
+        ranges.append(f'{letter}{start}' if start == end else f'{letter}{start}:{letter}{end}')
+        return ranges
+
+    def _apply_colors_to_excel(self, output_path: str, merged_df: pd.DataFrame,
+                               statistics: Optional[ChangeStatistics] = None,
+                               conditional_format: bool = False) -> None:
         """
         將顏色標記應用到 Excel 檔案
         
         Args:
             output_path: 輸出檔案路徑
             merged_df: 已標記變動的 DataFrame
+            statistics: 可選，比對統計；提供時另外寫入「變動統計」工作表
+            conditional_format: 以範圍式條件格式標色（每種顏色一條規則），取代逐格填色
         """
-        # 先寫入 Excel（不含顏色）
+        import pandas as pd
+        from openpyxl.formatting.rule import FormulaRule
+
         merged_df_clean = merged_df.drop(columns=[col for col in merged_df.columns if col.startswith('__')])
-        merged_df_clean.to_excel(output_path, index=False, engine='openpyxl')
-        
-        # 使用 openpyxl 添加顏色
-        wb = openpyxl.load_workbook(output_path)
-        ws = wb.active
-        
-        # 取得欄位名稱對應的欄位索引
-        header_row = 1
-        column_map = {}
-        for col_idx, cell in enumerate(ws[header_row], start=1):
-            column_map[cell.value] = col_idx
+
+        # 欄位名稱對應的欄位索引（1-based）
+        column_map = {col: col_idx for col_idx, col in enumerate(merged_df_clean.columns, start=1)}
         
         # 找出專案 key 欄位
         key_column = self._find_project_key_column(merged_df_clean)
-        key_col_idx = column_map.get(key_column)
-        seq_col_idx = column_map.get('Seq')
-        date_col_idx = column_map.get('Snapshot_Date')
-        
-        # 檢查是否有結構錯誤
-        has_structure_error = '__STRUCTURE_ERROR__' in merged_df.columns
-        
-        # 建立 DataFrame 索引到 Excel 行號的對應表
+        marker_columns = ['Seq', 'Snapshot_Date', key_column]
+
         # 因為 to_excel(index=False)，所以 Excel 行號 = DataFrame 位置 + 2（標題行 + 1-based）
-        index_to_excel_row = {}
-        for pos, df_idx in enumerate(merged_df.index):
-            index_to_excel_row[df_idx] = pos + 2  # +1 for header, +1 for 0-based to 1-based
-        
-        if has_structure_error:
+        last_row = len(merged_df) + 1
+
+        # 要標色的儲存格 {顏色: {欄位索引: {行號}}}
+        highlights: Dict[str, Dict[int, set]] = {self.YELLOW_COLOR: {}, self.RED_COLOR: {}}
+
+        if '__STRUCTURE_ERROR__' in merged_df.columns:
             # 結構異常：標記所有列為紅色（因為結構不一致，無法比對）
-            for df_idx in merged_df.index:
-                excel_row = index_to_excel_row[df_idx]
-                for col_idx in range(1, ws.max_column + 1):
-                    ws.cell(row=excel_row, column=col_idx).fill = self.RED_FILL
+            if last_row >= 2:
+                all_rows = set(range(2, last_row + 1))
+                for col_idx in column_map.values():
+                    highlights[self.RED_COLOR][col_idx] = all_rows
         else:
-            # 依專案分組處理
-            for key_value in merged_df['__NORMALIZED_KEY__'].unique():
-                if not key_value:
+            # 只有最新時間點的列會被標記 __HAS_CHANGE__
+            changed = merged_df['__HAS_CHANGE__'].astype(bool).to_numpy()
+            excel_rows = (changed.nonzero()[0] + 2).tolist()
+            for excel_row, changed_cells_str in zip(excel_rows, merged_df['__CHANGED_CELLS__'].to_numpy()[changed]):
+                changed_columns = changed_cells_str.split(',') if pd.notna(changed_cells_str) else []
+                # 標記變動的儲存格，同時標記 Seq、Snapshot_Date、專案名稱欄位
+                for col_name in changed_columns + marker_columns:
+                    col_idx = column_map.get(col_name)
+                    if col_idx:
+                        highlights[self.YELLOW_COLOR].setdefault(col_idx, set()).add(excel_row)
+
+        # 直接透過 ExcelWriter 取得工作表上色，不需重新載入剛寫出的檔案
+        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+            merged_df_clean.to_excel(writer, index=False)
+            ws = writer.sheets[next(iter(writer.sheets))]
+
+            for color, columns in highlights.items():
+                if not columns:
                     continue
-                
-                project_rows = merged_df[merged_df['__NORMALIZED_KEY__'] == key_value]
-                project_rows = project_rows.sort_values(['Snapshot_Date', 'Seq'], ascending=[True, True])
-                
-                # 取得 Excel 中的行號
-                excel_row_indices = [index_to_excel_row[df_idx] for df_idx in project_rows.index]
-                
-                # 檢查變動
-                latest_df_idx = project_rows.index[-1]
-                if merged_df.loc[latest_df_idx, '__HAS_CHANGE__']:
-                    latest_excel_row = excel_row_indices[-1]
-                    changed_cells_str = merged_df.loc[latest_df_idx, '__CHANGED_CELLS__']
-                    changed_columns = changed_cells_str.split(',') if pd.notna(changed_cells_str) else []
-                    
-                    # 標記變動的儲存格為黃色
-                    for col_name in changed_columns:
-                        if col_name in column_map:
-                            col_idx = column_map[col_name]
-                            ws.cell(row=latest_excel_row, column=col_idx).fill = self.YELLOW_FILL
-                    
-                    # 同時標記 Seq、Snapshot_Date、專案名稱欄位為黃色
-                    if seq_col_idx:
-                        ws.cell(row=latest_excel_row, column=seq_col_idx).fill = self.YELLOW_FILL
-                    if date_col_idx:
-                        ws.cell(row=latest_excel_row, column=date_col_idx).fill = self.YELLOW_FILL
-                    if key_col_idx:
-                        ws.cell(row=latest_excel_row, column=key_col_idx).fill = self.YELLOW_FILL
-            else:
-                # 檢查變動
-                latest_df_idx = project_rows.index[-1]
-                if merged_df.loc[latest_df_idx, '__HAS_CHANGE__']:
-                    latest_excel_row = excel_row_indices[-1]
-                    changed_cells_str = merged_df.loc[latest_df_idx, '__CHANGED_CELLS__']
-                    changed_columns = changed_cells_str.split(',') if pd.notna(changed_cells_str) else []
-                    
-                    # 標記變動的儲存格為黃色
-                    for col_name in changed_columns:
-                        if col_name in column_map:
-                            col_idx = column_map[col_name]
-                            ws.cell(row=latest_excel_row, column=col_idx).fill = self.YELLOW_FILL
-                    
-                    # 同時標記 Seq、Snapshot_Date、專案名稱欄位為黃色
-                    if seq_col_idx:
-                        ws.cell(row=latest_excel_row, column=seq_col_idx).fill = self.YELLOW_FILL
-                    if date_col_idx:
-                        ws.cell(row=latest_excel_row, column=date_col_idx).fill = self.YELLOW_FILL
-                    if key_col_idx:
-                        ws.cell(row=latest_excel_row, column=key_col_idx).fill = self.YELLOW_FILL
-        
-        # 儲存檔案
-        wb.save(output_path)
+                if conditional_format:
+                    ranges = [cell_range for col_idx, rows in sorted(columns.items())
+                              for cell_range in self._cell_ranges(col_idx, rows)]
+                    ws.conditional_formatting.add(' '.join(ranges),
+                                                  FormulaRule(formula=['TRUE'], fill=self._make_fill(color)))
+                else:
+                    fill = self.YELLOW_FILL if color == self.YELLOW_COLOR else self.RED_FILL
+                    for col_idx, rows in columns.items():
+                        for excel_row in rows:
+                            ws.cell(row=excel_row, column=col_idx).fill = fill
+
+            if statistics is not None:
+                self._write_summary_sheet(writer.book, statistics)
     
-    def compare_and_export(self, output_path: str) -> str:
+    @staticmethod
+    def _print_preflight_report(drifts: List[Dict[str, Any]],
+                                ignored_header_cells: Optional[Dict[str, int]] = None) -> None:
+        """輸出結構預檢結果（含被忽略的尾端空白標題）"""
+        for file_path, count in (ignored_header_cells or {}).items():
+            print(f"ℹ️  {file_path}: 預檢忽略 {count} 個尾端空白標題欄；"
+                  f"若其下有資料，完整載入時會成為 Unnamed 欄位")
+
+        if not drifts:
+            print("✅ 結構預檢通過")
+            return
+
+        print(f"⚠️  警告：{len(drifts)} 個檔案的欄位結構與第一個檔案不一致")
+        for drift in drifts:
+            print(f"   - {drift['file_path']}")
+            if drift['missing']:
+                print(f"     缺少欄位: {', '.join(drift['missing'])}")
+            if drift['extra']:
+                print(f"     多出欄位: {', '.join(drift['extra'])}")
+            if drift['order_changed']:
+                print("     欄位順序不同")
+
+    def compare_and_export(self, output_path: str, compact: bool = False,
+                           include_previous: bool = False) -> str:
         """
         執行完整比對流程並匯出結果
         
         Args:
             output_path: 輸出 Excel 檔案路徑
+            compact: 精簡模式，只輸出有變動專案的最新列，並以條件格式標色
+            include_previous: 精簡模式下同時輸出前一個時間點的列
             
         Returns:
             輸出檔案路徑
         """
+        if self.tracked_columns is not None:
+            first_header = set(self._read_header_columns(self.excel_files[0]))
+            missing = [col for col in self.tracked_columns if col not in first_header]
+            print(f"🎯 只追蹤 {len(self.tracked_columns)} 個欄位（另加專案 key 欄位）")
+            if missing:
+                print(f"⚠️  警告：第一個檔案沒有這些追蹤欄位: {', '.join(missing)}")
+            if self.export_full_rows and not (compact or include_previous):
+                print("⚠️  警告：非精簡模式下輸出完整欄位需再次完整讀取每個檔案，"
+                      "總載入時間會比不指定追蹤欄位更長（建議搭配 --compact 或 --with-previous）")
+
+        print("🩺 結構預檢（僅讀取標題列）...")
+        drifts = self.preflight_check()
+        self._print_preflight_report(drifts, self.ignored_header_cells)
+
         print("📂 開始載入 Excel 檔案...")
         self._load_excel_files()
         print(f"✅ 已載入 {len(self.dataframes)} 個檔案")
+        for timing in self.load_timings:
+            print(f"   - {os.path.basename(timing['file_path'])}: {timing['engine']} "
+                  f"{timing['seconds']:.3f} 秒（{timing['rows']} 列）")
         
         print("🔍 檢查欄位結構...")
         structure_issues = self._check_column_structure()
@@ -374,41 +855,149 @@ class EPAProjectComparator:
         merged_df = self._merge_projects()
         print(f"✅ 已合併 {len(merged_df)} 筆資料")
         
-        print("🔎 比對欄位變動...")
-        merged_df = self._compare_fields(merged_df)
+        if self.compare_workers > 1:
+            print(f"🔎 比對欄位變動（{self.compare_workers} 個程序分片）...")
+            merged_df = self._compare_fields_sharded(merged_df, self.compare_workers)
+        else:
+            print("🔎 比對欄位變動...")
+            merged_df = self._compare_fields(merged_df)
         changed_count = merged_df['__HAS_CHANGE__'].sum()
         print(f"✅ 發現 {changed_count} 筆專案有變動")
+
+        print("📊 彙總變動統計...")
+        self.statistics = self.compute_change_statistics(merged_df)
+        print(f"✅ 共 {self.statistics.total_projects} 個專案，"
+              f"{len(self.statistics.column_change_counts)} 個欄位有變動")
         
+        if compact or include_previous:
+            merged_df = self._select_compact_rows(merged_df, include_previous)
+            print(f"✂️  精簡模式：輸出 {len(merged_df)} 筆資料")
+
+        if self.export_full_rows:
+            print("📎 讀取輸出列的完整原始欄位...")
+            reread_start = len(self.load_timings)
+            merged_df = self._attach_full_rows(merged_df)
+            for timing in self.load_timings[reread_start:]:
+                print(f"   - {os.path.basename(timing['file_path'])}: {timing['engine']} "
+                      f"{timing['seconds']:.3f} 秒（{timing['rows']} 列，完整欄位）")
+
         print("🎨 套用顏色標記...")
-        self._apply_colors_to_excel(output_path, merged_df)
+        start = time.perf_counter()
+        self._apply_colors_to_excel(output_path, merged_df, self.statistics,
+                                    conditional_format=compact or include_previous)
+        self.export_report = {
+            'rows': len(merged_df),
+            'bytes': os.path.getsize(output_path),
+            'seconds': time.perf_counter() - start,
+            'compact': compact or include_previous,
+        }
         print(f"✅ 結果已匯出至: {output_path}")
+        print(f"   {self.export_report['rows']} 列，{self.export_report['bytes'] / 1024:.1f} KB，"
+              f"寫入 {self.export_report['seconds']:.2f} 秒")
         
         return output_path
 
 
+def _compare_shard(comparator_cls: type, shard_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    在子程序中比對單一分片
+
+    Returns:
+        只含有變動列的 __CHANGED_CELLS__ 欄位（減少回傳的資料量）
+    """
+    result = comparator_cls([])._compare_fields(shard_df.copy())
+    return result.loc[result['__HAS_CHANGE__'].astype(bool), ['__CHANGED_CELLS__']]
+
+
+def _print_usage() -> None:
+    """輸出命令列使用說明"""
+    print("使用方法:")
+    print("  python epa_project_comparator.py <輸出檔案> <檔案1> [檔案2] [檔案3] ...")
+    print("\n範例:")
+    print("  python epa_project_comparator.py output.xlsx file1.xlsx file2.xlsx file3.xlsx")
+    print("\n可選：手動指定日期（使用 --date 參數）")
+    print("  python epa_project_comparator.py output.xlsx file1.xlsx --date file1.xlsx:2024/01/15 file2.xlsx --date file2.xlsx:2024/02/20")
+    print("\n可選：只做結構預檢（僅讀取標題列，不輸出檔案）")
+    print("  python epa_project_comparator.py --preflight file1.xlsx file2.xlsx file3.xlsx")
+    print("\n可選：指定 Excel 讀取引擎（auto / openpyxl / calamine / xlrd，預設 auto）")
+    print("  python epa_project_comparator.py output.xlsx file1.xlsx file2.xlsx --engine calamine")
+    print("\n可選：比較各讀取引擎的載入時間（不輸出檔案）")
+    print("  python epa_project_comparator.py --benchmark-engines file1.xlsx file2.xlsx")
+    print("\n可選：精簡輸出，只保留有變動專案的最新列（--with-previous 同時保留前一列）")
+    print("  python epa_project_comparator.py output.xlsx file1.xlsx file2.xlsx --compact")
+    print("  python epa_project_comparator.py output.xlsx file1.xlsx file2.xlsx --with-previous")
+    print("\n可選：依專案 key 分片，以多個程序平行比對（0 表示使用所有 CPU）")
+    print("  python epa_project_comparator.py output.xlsx file1.xlsx file2.xlsx --workers 8")
+    print("\n可選：只載入與比對指定欄位（--full-rows 讓輸出仍包含全部原始欄位）")
+    print("  python epa_project_comparator.py output.xlsx file1.xlsx file2.xlsx --columns \"Status,Capacity\"")
+    print("  python epa_project_comparator.py output.xlsx file1.xlsx file2.xlsx --column-profile tracked.txt --full-rows --compact")
+    print("\n可選：交由本機比對服務執行（見 comparison_service.py）")
+    print("  python epa_project_comparator.py output.xlsx file1.xlsx file2.xlsx --server http://127.0.0.1:8765")
+
+
 def main():
     """主程式入口（範例使用）"""
     import sys
-    
-    if len(sys.argv) < 3:
-        print("使用方法:")
-        print("  python epa_project_comparator.py <輸出檔案> <檔案1> [檔案2] [檔案3] ...")
-        print("\n範例:")
-        print("  python epa_project_comparator.py output.xlsx file1.xlsx file2.xlsx file3.xlsx")
-        print("\n可選：手動指定日期（使用 --date 參數）")
-        print("  python epa_project_comparator.py output.xlsx file1.xlsx --date file1.xlsx:2024/01/15 file2.xlsx --date file2.xlsx:2024/02/20")
+
+    args = sys.argv[1:]
+    if '-h' in args or '--help' in args:
+        _print_usage()
+        sys.exit(0)
+
+    compact = '--compact' in args
+    include_previous = '--with-previous' in args
+    export_full_rows = '--full-rows' in args
+    args = [arg for arg in args if arg not in ('--compact', '--with-previous', '--full-rows')]
+
+    preflight_only = '--preflight' in args
+    benchmark_only = '--benchmark-engines' in args
+    if preflight_only or benchmark_only:
+        args = [arg for arg in args if arg not in ('--preflight', '--benchmark-engines')]
+        output_path = None
+    elif len(args) < 2:
+        _print_usage()
         sys.exit(1)
-    
-    output_path = sys.argv[1]
+    else:
+        output_path = args.pop(0)
+
     excel_files = []
     snapshot_dates = {}
+    server_url = None
+    read_engine = 'auto'
+    compare_workers = 1
+    tracked_columns = None
     
     # 解析參數
-    i = 2
-    while i < len(sys.argv):
-        arg = sys.argv[i]
-        if arg == '--date' and i + 1 < len(sys.argv):
-            date_spec = sys.argv[i + 1]
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--server' and i + 1 < len(args):
+            server_url = args[i + 1]
+            i += 2
+        elif arg == '--engine' and i + 1 < len(args):
+            read_engine = args[i + 1]
+            i += 2
+        elif arg == '--columns' and i + 1 < len(args):
+            tracked_columns = [col.strip() for col in args[i + 1].split(',') if col.strip()]
+            i += 2
+        elif arg == '--column-profile' and i + 1 < len(args):
+            try:
+                tracked_columns = EPAProjectComparator.load_column_profile(args[i + 1])
+            except OSError as e:
+                print(f"❌ 錯誤：無法讀取欄位設定檔: {e}")
+                sys.exit(1)
+            i += 2
+        elif arg == '--workers' and i + 1 < len(args):
+            try:
+                compare_workers = int(args[i + 1])
+            except ValueError:
+                compare_workers = -1
+            if compare_workers < 0:
+                print(f"❌ 錯誤：--workers 需為非負整數: {args[i + 1]}")
+                sys.exit(1)
+            i += 2
+        elif arg == '--date' and i + 1 < len(args):
+            date_spec = args[i + 1]
             if ':' in date_spec:
                 file_path, date_str = date_spec.split(':', 1)
                 snapshot_dates[file_path] = date_str
@@ -420,13 +1009,79 @@ def main():
                 excel_files.append(arg)
             i += 1
     
+    from excel_readers import select_engine
+
+    missing_files = [file_path for file_path in excel_files if not os.path.exists(file_path)]
+    if missing_files:
+        print(f"❌ 錯誤：檔案不存在: {', '.join(missing_files)}")
+        sys.exit(1)
+
+    if not benchmark_only:
+        try:
+            for file_path in excel_files:
+                select_engine(file_path, read_engine)
+        except (ValueError, OSError) as e:
+            print(f"❌ 錯誤：{e}")
+            sys.exit(1)
+
+    if benchmark_only:
+        from excel_readers import benchmark_engines
+
+        if not excel_files:
+            print("❌ 錯誤：至少需要 1 個 Excel 檔案")
+            sys.exit(1)
+        for file_path in excel_files:
+            print(f"⏱️  {file_path}")
+            for result in benchmark_engines(file_path):
+                if result['error']:
+                    print(f"   - {result['engine']:<9} 失敗：{result['error']}")
+                else:
+                    print(f"   - {result['engine']:<9} {result['seconds']:.3f} 秒（{result['rows']} 列）")
+        return
+
     if len(excel_files) < 2:
         print("❌ 錯誤：至少需要 2 個 Excel 檔案")
         sys.exit(1)
     
+    comparator = EPAProjectComparator(excel_files, snapshot_dates, read_engine=read_engine,
+                                      compare_workers=compare_workers, tracked_columns=tracked_columns,
+                                      export_full_rows=export_full_rows)
+
+    if preflight_only:
+        drifts = comparator.preflight_check()
+        EPAProjectComparator._print_preflight_report(drifts, comparator.ignored_header_cells)
+        sys.exit(1 if drifts else 0)
+
+    if server_url:
+        from comparison_service import ComparisonClient, ServiceError
+
+        # 服務端使用自己的 worker 程序池，無法依單次請求調整程序數
+        if compare_workers != 1:
+            print("❌ 錯誤：--workers 不能與 --server 同時使用（程序數由比對服務的 --workers 決定）")
+            sys.exit(1)
+
+        # 日期在客戶端判斷，才能保留原始檔案的修改時間
+        files = []
+        for file_path in excel_files:
+            with open(file_path, 'rb') as f:
+                files.append({'name': os.path.basename(file_path), 'content': f.read(),
+                              'snapshot_date': comparator._get_file_time(file_path)})
+        try:
+            result = ComparisonClient(server_url).compare(files, os.path.basename(output_path),
+                                                          read_engine=read_engine, compact=compact,
+                                                          include_previous=include_previous,
+                                                          tracked_columns=tracked_columns,
+                                                          export_full_rows=export_full_rows)
+        except (ServiceError, OSError) as e:
+            print(f"❌ 比對服務錯誤：{e}")
+            sys.exit(1)
+        with open(output_path, 'wb') as f:
+            f.write(result)
+        print(f"✅ 結果已匯出至: {output_path}")
+        return
+
     # 執行比對
-    comparator = EPAProjectComparator(excel_files, snapshot_dates)
-    comparator.compare_and_export(output_path)
+    comparator.compare_and_export(output_path, compact=compact, include_previous=include_previous)
 
 
 if __name__ == '__main__':
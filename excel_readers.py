@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+EPA 專案版本比對工具 - Excel 讀取引擎
+功能：統一包裝 pandas 支援的讀取引擎（openpyxl / calamine / xlrd），依檔案類型與大小自動選擇
+"""
+
+import importlib.metadata
+import importlib.util
+import os
+import re
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# 引擎名稱 → 需要的模組、支援的副檔名與最低 pandas 版本
+READ_ENGINES: Dict[str, Dict[str, Any]] = {
+    'openpyxl': {'module': 'openpyxl', 'extensions': {'.xlsx', '.xlsm'}, 'min_pandas': (2, 0)},
+    'calamine': {'module': 'python_calamine', 'extensions': {'.xlsx', '.xlsm', '.xls'}, 'min_pandas': (2, 2)},
+    'xlrd': {'module': 'xlrd', 'extensions': {'.xls'}, 'min_pandas': (2, 0)},
+}
+
+# 自動選擇時使用的引擎名稱
+AUTO_ENGINE = 'auto'
+
+# .xlsx 超過此大小才改用 calamine；小檔案維持 openpyxl，型別推斷與過去的輸出一致
+CALAMINE_MIN_BYTES = 512 * 1024
+
+
+def _file_extension(file_path: str) -> str:
+    return os.path.splitext(file_path)[1].lower()
+
+
+def _pandas_version() -> Tuple[int, int]:
+    """已安裝的 pandas 主、次版本（不 import pandas）；未安裝時為 (0, 0)"""
+    try:
+        version = importlib.metadata.version('pandas')
+    except importlib.metadata.PackageNotFoundError:
+        return (0, 0)
+    match = re.match(r'(\d+)\.(\d+)', version)
+    return (int(match.group(1)), int(match.group(2))) if match else (0, 0)
+
+
+def is_engine_available(engine: str) -> bool:
+    """引擎所需的套件是否已安裝，且 pandas 版本支援此引擎（calamine 需 pandas>=2.2）"""
+    spec = READ_ENGINES[engine]
+    return (importlib.util.find_spec(spec['module']) is not None
+            and _pandas_version() >= spec['min_pandas'])
+
+
+def available_engines(file_path: Optional[str] = None) -> List[str]:
+    """
+    列出已安裝的引擎
+
+    Args:
+        file_path: 可選，只列出支援此檔案類型的引擎
+    """
+    extension = _file_extension(file_path) if file_path else None
+    return [name for name, spec in READ_ENGINES.items()
+            if (extension is None or extension in spec['extensions']) and is_engine_available(name)]
+
+
+def select_engine(file_path: str, engine: str = AUTO_ENGINE) -> str:
+    """
+    決定讀取檔案要使用的引擎
+
+    自動選擇規則：calamine 可用時（已安裝 python-calamine 且 pandas>=2.2），
+    .xls 與大於 CALAMINE_MIN_BYTES 的 .xlsx 使用 calamine；其餘 .xls 使用 xlrd、.xlsx 使用 openpyxl。
+
+    Args:
+        file_path: Excel 檔案路徑
+        engine: 引擎名稱或 'auto'
+
+    Returns:
+        引擎名稱
+
+    Raises:
+        ValueError: 引擎名稱未知、不支援此檔案類型，或所需套件／pandas 版本不符
+    """
+    extension = _file_extension(file_path)
+
+    if engine != AUTO_ENGINE:
+        if engine not in READ_ENGINES:
+            raise ValueError(f"未知的讀取引擎: {engine}（可用：{AUTO_ENGINE}, {', '.join(READ_ENGINES)}）")
+        if extension not in READ_ENGINES[engine]['extensions']:
+            raise ValueError(f"讀取引擎 {engine} 不支援 {extension} 檔案: {file_path}")
+        if not is_engine_available(engine):
+            spec = READ_ENGINES[engine]
+            min_pandas = '.'.join(map(str, spec['min_pandas']))
+            raise ValueError(f"讀取引擎 {engine} 無法使用：需要安裝 {spec['module'].replace('_', '-')} 且 pandas>={min_pandas}")
+        return engine
+
+    calamine_ready = is_engine_available('calamine')
+    if extension == '.xls':
+        return 'calamine' if calamine_ready else 'xlrd'
+    if calamine_ready and os.path.getsize(file_path) >= CALAMINE_MIN_BYTES:
+        return 'calamine'
+    return 'openpyxl'
+
+
+def read_excel(file_path: str, engine: str = AUTO_ENGINE, **kwargs) -> Tuple['pd.DataFrame', str, float]:
+    """
+    以指定（或自動選擇）的引擎讀取 Excel
+
+    Args:
+        file_path: Excel 檔案路徑
+        engine: 引擎名稱或 'auto'
+        **kwargs: 傳給 pd.read_excel 的其他參數
+
+    Returns:
+        (DataFrame, 實際使用的引擎, 讀取秒數)
+    """
+    import pandas as pd
+
+    engine_used = select_engine(file_path, engine)
+    start = time.perf_counter()
+    df = pd.read_excel(file_path, engine=engine_used, **kwargs)
+    return df, engine_used, time.perf_counter() - start
+
+
+def benchmark_engines(file_path: str, repeat: int = 1) -> List[Dict[str, Any]]:
+    """
+    以每個已安裝且支援此檔案類型的引擎讀取檔案並計時
+
+    Args:
+        file_path: Excel 檔案路徑
+        repeat: 每個引擎重複次數，取最快的一次
+
+    Returns:
+        [{'engine', 'seconds', 'rows', 'error'}]，依秒數由快到慢排序，失敗的引擎排在最後
+    """
+    results = []
+    for engine in available_engines(file_path):
+        best = None
+        rows = None
+        error = None
+        for _ in range(max(repeat, 1)):
+            try:
+                df, _, seconds = read_excel(file_path, engine)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                break
+            rows = len(df)
+            best = seconds if best is None else min(best, seconds)
+        results.append({'engine': engine, 'seconds': best, 'rows': rows, 'error': error})
+
+    results.sort(key=lambda r: (r['seconds'] is None, r['seconds'] or 0.0))
+    return results